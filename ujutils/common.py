@@ -1,24 +1,26 @@
 import os
-from collections import Counter
-from typing import Union
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import TYPE_CHECKING, Union
 
-import numpy as np
-import pandas as pd
-from natsort import natsorted
-from pandas.core.arrays.categorical import Categorical
-from rich.console import Console
-from rich.filesize import decimal
+from .misc import _gen_ordering_func, _get_ext, _linl
 
-from .directory import Directory
-from .misc import _gen_ordering_func, _get_ext, _linl, _sorted
+# heavy modules are imported lazily inside the functions that need them
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
 
 
 ##############################################################################
 # is_ipython
 ##############################################################################
+@lru_cache(maxsize=1)
 def is_ipython() -> bool:
     """Check if script is executed in IPython (incl. Jupyter)
 
+    (Note) The answer never changes within a process, so it is cached.
+
     Examples:
         >>> is_ipython()
         True
@@ -29,12 +31,10 @@ def is_ipython() -> bool:
 
     try:
         from IPython import get_ipython
-    except BaseException:
+    except ImportError:
         return False
 
-    if get_ipython() is not None:
-        return True
-    return False
+    return get_ipython() is not None
 
 
 ##############################################################################
@@ -55,11 +55,15 @@ def mlsorted(x: list, order: list = None) -> list:
     Returns:
         list: Sorted list
     """
+    from natsort import natsorted
+
     # default order
     _translate = _gen_ordering_func(order=order)
 
-    # sort
-    return natsorted(x, key=lambda x: _translate(x))
+    # translate each element once, then sort positions by the keys
+    x = list(x)
+    keys = [_translate(_) for _ in x]
+    return [x[i] for i in natsorted(range(len(x)), key=keys.__getitem__)]
 
 
 ##############################################################################
@@ -69,65 +73,118 @@ def scandir(
     root: Union[str, os.DirEntry],
     extensions: Union[str, os.DirEntry] = None,
     subdirs: Union[str, os.DirEntry] = None,
+    n_workers: int = None,
+    summary_only: bool = False,
 ) -> dict:
     """Scan directory recursively
 
     (Note)
         It returns dict. Keys are subdir, values are filepaths in the subdir.
+        Files are stored as (DirEntry, stat_result) tuples, so downstream
+        callers can reuse the stat without another syscall. 'exts' holds
+        the extension of each file in 'files'.
 
     Args:
         root (str, os.DirEntry): Root directory to scan.
         extensions (str, os.DirEntry, optional): Extensions. Defaults to None.
+        subdirs (str, list, optional):
+            Paths of subdirectories not to descend into. Defaults to None.
+        n_workers (int, optional):
+            Number of threads scanning directories. 1 scans serially.
+            Defaults to min(8, cpu count).
+        summary_only (bool, optional):
+            If true, keep only paths of 'dirs' and (name, size) of 'files'
+            instead of DirEntry and stat_result objects. Defaults to False.
 
     Returns:
         dict: Key is directory and value is files in the directory.
+            Keys are sorted, also when scanned with threads.
     """
 
     # correct args
     extensions = _linl(extensions, sep=',', strip='. ')
-
-    # (helper) scandir
-    def _scandir(root, results, extensions, subdirs):
-
-        # scandir
-        dirs, files = [], []
-        _ = [
-            dirs.append(_) if _.is_dir() else files.append(_)
-            for _ in os.scandir(root)
-        ]
-        n_entries = len(_)
-        n_files = len(files)
-
-        if extensions is not None:
-            files = [_ for _ in files if _get_ext(_) in extensions]
-
-        # update
-        results[root] = {
-            'dirs': dirs,
+    if extensions is not None:
+        extensions = frozenset(_.lower() for _ in extensions)
+    subdirs = _linl(subdirs, sep=',')
+    if subdirs is not None:
+        subdirs = frozenset(os.path.normpath(os.fspath(_)) for _ in subdirs)
+    if n_workers is None:
+        n_workers = min(8, os.cpu_count() or 1)
+
+    # (helper) scan a single directory
+    def _scandir(parent):
+
+        # scandir - extension is parsed once per file and kept with it
+        dirs, files, exts = [], [], []
+        n_entries, n_files = 0, 0
+        with os.scandir(parent) as it:
+            for entry in it:
+                n_entries += 1
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(entry)
+                    continue
+                n_files += 1
+                ext = _get_ext(entry)
+                if extensions is not None and ext not in extensions:
+                    continue
+                st = entry.stat(follow_symlinks=False)
+                if summary_only:
+                    files.append((entry.name, st.st_size))
+                else:
+                    files.append((entry, st))
+                exts.append(ext)
+
+        result = {
+            'dirs': [d.path for d in dirs] if summary_only else dirs,
             'files': files,
+            'exts': exts,
             'n_entries': n_entries,
             'n_files': n_files,
         }
 
-        for d in dirs:
-            if subdirs is not None:
-                if d in subdirs:
-                    continue
-            _scandir(d, results, extensions, subdirs)
+        # prune before descending
+        children = [
+            d.path for d in dirs
+            if subdirs is None or os.path.normpath(d.path) not in subdirs
+        ]
+
+        return parent, result, children
 
-    # scan recursively
     results = dict()
-    _scandir(root, results, extensions, subdirs)
 
-    return results
+    # scan breadth-first
+    if n_workers == 1:
+        queue = deque([os.fspath(root)])
+        while queue:
+            parent, result, children = _scandir(queue.popleft())
+            results[parent] = result
+            queue.extend(children)
+
+    # scan with threads - os.scandir and stat release the GIL
+    else:
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            pending = {executor.submit(_scandir, os.fspath(root))}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    parent, result, children = future.result()
+                    results[parent] = result
+                    pending |= {
+                        executor.submit(_scandir, _) for _ in children
+                    }
+
+    # threads finish in any order, sort by directory for a stable result
+    return dict(sorted(results.items()))
 
 
 ##############################################################################
 # tree_files
 ##############################################################################
-if True:
+def tree(*args, **kwargs):
+    """Print tree of files, see 'rich_print.rich_tree'"""
     from .rich_print import rich_tree
-    tree = rich_tree
+
+    return rich_tree(*args, **kwargs)
 
 
 ##############################################################################
@@ -144,7 +201,9 @@ def table_files(
     relpath: bool = False,
     order: list = None,
     reset_index: list = True,
-) -> pd.DataFrame:
+    n_workers: int = 1,
+    chunksize: int = None,
+) -> 'pd.DataFrame':
     """Make stat table (filename, filepath, ...) for given root directory
 
     (Note)
@@ -177,10 +236,17 @@ def table_files(
             Custom order for table sorting. Defaults to None.
         reset_index (bool, optional):
             Reset index after filtering. Defaults to True.
+        n_workers (int, optional):
+            Threads scanning directories. Defaults to 1.
+        chunksize (int, optional):
+            If given, return an iterator of tables, each from at most
+            chunksize scanned entries. Defaults to None.
 
     Returns:
-        pd.DataFrame
+        pd.DataFrame, or iterator of pd.DataFrame if chunksize is given.
     """
+    from .directory import Directory
+
     directory = Directory(
         root,
         hrchy=hrchy,
@@ -191,7 +257,9 @@ def table_files(
         include_meta=include_meta,
         relpath=relpath,
         order=order,
-        reset_index=reset_index
+        reset_index=reset_index,
+        n_workers=n_workers,
+        chunksize=chunksize,
     )
 
     return directory.table
@@ -199,10 +267,9 @@ def table_files(
 
 ##############################################################################
 # encode labels
-# TODO use pd.get_dummies
 ##############################################################################
 def encode_labels(
-    labels: Union[list, np.ndarray, pd.Series],
+    labels: Union[list, 'np.ndarray', 'pd.Series'],
     multi_label: bool = False,
     sep: str = '|'
 ):
@@ -235,48 +302,68 @@ def encode_labels(
 
     Returns:
         list or np.array: Coded labels. List in list out, array in array out.
+            Multi-label arrays are int8 and column-major (order='F').
         dict: encoder
         dict: decoder
     """
+    import numpy as np
+    import pandas as pd
 
-    # get classes
+    # get classes - series and categoricals are factorized as they are
     if not multi_label:
-        classes = mlsorted(filter(None, set(labels)))
+        if isinstance(labels, (pd.Series, pd.Categorical)):
+            codes, uniques = pd.factorize(labels)
+        else:
+            codes, uniques = pd.factorize(pd.Series(labels, dtype=object))
     else:
-        classes = mlsorted(
-            {labs for item in filter(None, labels) for labs in item.split(sep)}
+        # one token per row, indexed by the position of its label
+        tokens = (
+            pd.Series(labels, dtype=object).reset_index(drop=True)
+            .str.split(sep, regex=False).explode()
         )
-    classes = [_ for _ in classes if _ not in ['']]
+        tokens = tokens[tokens.notna() & (tokens != '')]
+        codes, uniques = pd.factorize(tokens)
+    classes = mlsorted(filter(None, uniques))
     n_classes = len(classes)
 
     # generate encoder and decoder
     encoder = {_class: code for code, _class in enumerate(classes)}
     decoder = {v: k for k, v in encoder.items()}
 
+    # remap factorized codes to the sorted classes, missing stays -1
+    _remap = np.array(
+        [encoder.get(_, -1) for _ in uniques] + [-1], dtype=np.int32
+    )
+
     # create coded labels
     if not multi_label:
-        coded_labels = [encoder[x] if x is not None else x for x in labels]
+        coded_labels = _remap[codes]
+        if not isinstance(labels, (pd.Series, np.ndarray, pd.Categorical)):
+            coded_labels = [
+                _ if _ >= 0 else None for _ in coded_labels.tolist()
+            ]
     else:
-        coded_labels = list()
-        for x in labels:
-            labs = [0] * n_classes
-            if x is not None:
-                for lab in x.split(sep):
-                    labs[encoder[lab]] = 1
-            coded_labels.append(labs)
+        # one-hot is read per class, so keep columns contiguous
+        coded_labels = np.zeros(
+            (len(labels), n_classes), dtype=np.int8, order='F'
+        )
+        coded_labels[tokens.index.to_numpy(), _remap[codes]] = 1
+        if not isinstance(labels, (pd.Series, np.ndarray, pd.Categorical)):
+            coded_labels = coded_labels.tolist()
 
     # to numpy or to dataframe
     if isinstance(labels, (pd.Series, pd.DataFrame)):
         if multi_label:
             coded_labels = pd.DataFrame(
-                coded_labels, columns=encoder.keys()
+                coded_labels, columns=list(encoder)
             )
         else:
             coded_labels = pd.DataFrame(
-                {'y': coded_labels}, dtype=np.int32
+                {'y': coded_labels}, copy=False
             )
-    elif isinstance(labels, (np.ndarray, Categorical)):
-        coded_labels = np.array(coded_labels, dtype=np.int32)
+    elif isinstance(labels, (np.ndarray, pd.Categorical)):
+        if not multi_label:
+            coded_labels = np.asarray(coded_labels, dtype=np.int32)
 
     return coded_labels, encoder, decoder
 
@@ -286,6 +373,10 @@ def encode_labels(
 # TODO use Directory instead of scandir, and remove scandir from module
 ##############################################################################
 def inspect_dir(root, console=None):
+    import numpy as np
+    import pandas as pd
+    from rich.console import Console
+    from rich.filesize import decimal
 
     # duplicated
     # extensions
@@ -299,10 +390,10 @@ def inspect_dir(root, console=None):
     console.print(f"[bold yellow][Start][/bold yellow] Inspect {_abspath}")
 
     # take a snapshot
-    results = scandir(root)
+    results = scandir(root, summary_only=True)
 
     # directory summary
-    subdirs = [_.path for k, v in results.items() for _ in v['dirs']]
+    subdirs = [_ for k, v in results.items() for _ in v['dirs']]
     subdirs_empty = [k for k, v in results.items() if v['n_entries'] == 0]
     depths = [len(_.split('/')) for _ in subdirs]
     _max_depth = max(depths)
@@ -315,17 +406,21 @@ def inspect_dir(root, console=None):
     if len(subdirs_empty) > 0:
         msg += [f"  - {len(subdirs_empty)} directories are empty end."]
         for _ in subdirs_empty:
-            msg += [f"    . '{_.path}' is empty"]
+            msg += [f"    . '{_}' is empty"]
 
     console.print('\n' + '\n'.join(msg))
 
     # file summary
     files = [_ for k, v in results.items() for _ in v['files']]
-    filenames = [(_.name, _.stat().st_size) for _ in files]
-    exts = [_get_ext(_) for _ in files]
-    n_exts = len(exts)
-    count_exts = dict(Counter(exts))
-    count_exts = _sorted(count_exts, key=lambda _: count_exts[_], reverse=True)
+    names = [name for name, size in files]
+    sizes = np.fromiter(
+        (size for name, size in files), dtype=np.int64, count=len(files)
+    )
+    exts = pd.Series(
+        [_ for k, v in results.items() for _ in v['exts']], dtype=object
+    )
+    count_exts = exts.value_counts()
+    n_exts = len(count_exts)
 
     msg = [
         f"Total {len(files)} files are found.",
@@ -336,15 +431,14 @@ def inspect_dir(root, console=None):
         _k = f".{k}" if len(k) > 0 else ""
         msg += [f"    . '{_k}' {v} files."]
 
-    if len(files) != len(set(filenames)):
-        count_files = dict(Counter(filenames))
-        count_files = {k: v for k, v in count_files.items() if v > 1}
-        count_files = _sorted(
-            count_files, lambda _: (count_files[_]), reverse=True
-        )
+    # count only when (name, size) pairs are duplicated
+    _files = pd.MultiIndex.from_arrays([names, sizes])
+    if _files.has_duplicates:
+        count_files = _files.value_counts()
+        count_files = count_files[count_files > 1]
         msg += [f"  - {len(count_files)} files might be duplicated."]
         for k, v in count_files.items():
-            msg += [f"    . {v} '{k[0]}' ({decimal(k[1])}) found."]
+            msg += [f"    . {v} '{k[0]}' ({decimal(int(k[1]))}) found."]
 
     console.print('\n' + '\n'.join(msg))
 
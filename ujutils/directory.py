@@ -1,11 +1,32 @@
 import os
-from datetime import datetime
+from array import array
+from collections import OrderedDict
+from itertools import islice, zip_longest
 from typing import Union
 
 import numpy as np
 import pandas as pd
+from dateutil.tz import tzlocal
 
-from .misc import _get_ext, _linl, _gen_ordering_func
+from .misc import _get_ext, _linl, _gen_ordering_func, _walk_entries
+
+
+# columns with a native dtype, the others are python objects
+_TYPED = frozenset(['is_file', 'size', 'atime', 'mtime', 'ctime'])
+
+
+# (helper) _to_local_datetime
+def _to_local_datetime(x: np.ndarray) -> pd.DatetimeIndex:
+    return (
+        pd.to_datetime(x, unit='s', utc=True)
+        .tz_convert(tzlocal()).tz_localize(None)
+        .round('us')
+    )
+
+
+# scans shared by Directory instances with cache=True, least recent first
+_SCAN_CACHE = OrderedDict()
+_SCAN_CACHE_SIZE = 8
 
 
 ##############################################################################
@@ -25,9 +46,21 @@ class Directory(object):
         relpath: bool = False,
         order: list = None,
         reset_index: bool = True,
+        n_workers: int = 1,
+        chunksize: int = None,
+        cache: bool = False,
     ):
         """Generate table of files from given directory
 
+        (Note) 'reldir' always uses '/' as separator, also on Windows.
+        (Note)
+            If chunksize is given, 'table' is an iterator of tables like
+            pd.read_csv(chunksize=...). Chunks share columns and dtypes and
+            continue the index of the previous chunk. Rows are in walk order,
+            not sorted, label columns are the names of hrchy only (deeper
+            levels are left in 'reldir') and hold objects, 'reldir' and
+            'extension' hold strings instead of categories.
+
         Args:
             root (str, os.DirEntry, optional): Defaults to '.'.
             hrchy (str, list, optional):
@@ -46,6 +79,16 @@ class Directory(object):
                 Custom order for table sorting. Defaults to None.
             reset_index (bool, optional):
                 Reset index after filtering. Defaults to True.
+            n_workers (int, optional):
+                Threads scanning directories. Worth raising on large trees
+                and network filesystems. Defaults to 1.
+            chunksize (int, optional):
+                Number of scanned entries per table. Defaults to None.
+            cache (bool, optional):
+                Reuse the scan of an earlier Directory with the same root and
+                filters while root's mtime is unchanged. Changes deeper in
+                the tree don't bump it, call 'invalidate_cache' then.
+                Defaults to False.
         """
         # inputs
         self.root = os.path.abspath(root)
@@ -57,72 +100,128 @@ class Directory(object):
         self.relpath = relpath
         self.order = order
         self.reset_index = reset_index
+        self.n_workers = n_workers
+        self.chunksize = chunksize
+        self.cache = cache
 
         # generate ordering function
         self._translate = _gen_ordering_func(self.order)
 
-        # update attrs
-        self.entries = []
-        self._records = []
-        self._scandir(self.root)
-
-        # generate table
-        self._table = (
-            pd.DataFrame(self._records)
-            .sort_values('reldir', key=lambda x: x.map(self._translate))
-            .reset_index(drop=True)
-        )
-        del self._records
-
-        # generate labels
-        self._labels = (
-            self._table['reldir'].str.split('/', expand=True)
-            .replace({'': None})
-        )
+        # scan directory and generate table, chunks are scanned on demand
+        if self.chunksize is None:
+            self._scan()
         self.hrchy = hrchy
 
     @property
     def table(self):
+        # chunked tables are scanned while iterating
+        if self.chunksize is not None:
+            return self._iter_table()
+
+        # rescan if filters were widened
+        if self._dirty:
+            self._scan()
+            self.hrchy = self.hrchy
+
+        # stat scanned entries if include_meta was turned on after the scan
+        if self.include_meta and not self._has_meta:
+            self._add_meta()
+
+        return self._make_table()
+
+    def _iter_table(self):
+        # running offsets of scanned entries and yielded rows
+        self._n_scanned, self._n_yielded = 0, 0
+        walk = self._walk()
+        while True:
+            self._scan(islice(walk, self.chunksize))
+            if len(self._table) == 0:
+                return
+            self.hrchy = self.hrchy
+            _table = self._make_table()
+            self._n_scanned += len(self._table)
+            self._n_yielded += len(_table)
+            if len(_table) > 0:
+                yield _table
+
+    def _make_table(self):
         # filter table
         indices = self._filter(is_file=True)
 
-        # labels are categorical
-        _labels = self._labels
-        for _ in _labels.columns:
-            _labels[_] = pd.Categorical(
-                _labels[_], _labels[_].dropna().unique()
-            )
-
-        # concat labels and table
-        _table = pd.concat(
-            [_labels.loc[indices, :], self._table.loc[indices, :]],
-            axis=1
-        )
+        # collect filtered columns and build table at once
+        _meta = ['size', 'atime', 'mtime', 'ctime']
+        _chunked = self.chunksize is not None
+        _columns = dict()
+        if not _chunked:
+            for _ in self._labels.columns:
+                _columns[_] = self._labels[_].array[indices]
+        else:
+            # chunks share a schema, depth is not known before the walk ends
+            for i, _ in enumerate(self._hrchy or []):
+                if i < self._labels.shape[1]:
+                    _columns[_] = np.asarray(
+                        self._labels.iloc[:, i].array[indices], dtype=object
+                    )
+                else:
+                    _columns[_] = np.full(len(indices), np.nan, dtype=object)
+        for _ in self._table.columns:
+            if not self.include_meta and _ in _meta:
+                continue
+            _columns[_] = self._table[_].array[indices]
+        if not _chunked:
+            _columns['reldir'] = _columns['reldir'].remove_unused_categories()
+        else:
+            # categories of a chunk differ from the others, concat drops them
+            for _ in ['reldir', 'extension']:
+                _columns[_] = np.asarray(_columns[_], dtype=object)
 
         # if relpath is true
         if self.relpath:
-            _table['filepath'] = [
-                _.replace(self.root, '', 1).strip('/')
-                for _ in _table['filepath']
-            ]
+            _columns['filepath'] = (
+                pd.Series(_columns['filepath'], copy=False)
+                .str.slice(len(self.root)).str.lstrip(os.sep).array
+            )
 
-        # if not include_meta
-        if not self.include_meta:
-            _table = _table.drop(columns=['size', 'atime', 'mtime', 'ctime'])
+        # keep original index unless reset_index, chunks continue the index
+        if not _chunked:
+            index = None if self.reset_index else self._table.index[indices]
+        elif self.reset_index:
+            index = pd.RangeIndex(
+                self._n_yielded, self._n_yielded + len(indices)
+            )
+        else:
+            index = self._n_scanned + indices
+        _table = pd.DataFrame(_columns, index=index)
 
-        # reset index
-        if self.reset_index:
-            _table = _table.reset_index(drop=True)
+        # labels stay objects, strings would be inferred unless all missing
+        if _chunked and self._hrchy:
+            _table = _table.astype(dict.fromkeys(self._hrchy, object))
 
         return _table
 
+    @property
+    def entries(self):
+        # DirEntry objects are not kept alive, every access walks again
+        return list(self.iter_entries())
+
+    def iter_entries(self):
+        """Iterate DirEntry of every entry under root, filters not applied"""
+        return (
+            entry for entry, _, _ in _walk_entries(
+                self.root, stat=False, n_workers=self.n_workers
+            )
+        )
+
     @property
     def exts(self):
         return self._exts
 
     @exts.setter
     def exts(self, val):
-        self._exts = _linl(val, sep=',', strip='. ')
+        val = _linl(val, sep=',', strip='. ')
+        if val != getattr(self, '_exts', None):
+            self._dirty = True
+        self._exts = val
 
     @property
     def exts_ignore(self):
@@ -130,7 +229,10 @@ class Directory(object):
 
     @exts_ignore.setter
     def exts_ignore(self, val):
-        self._exts_ignore = _linl(val, sep=',', strip='. ')
+        val = _linl(val, sep=',', strip='. ')
+        if val != getattr(self, '_exts_ignore', None):
+            self._dirty = True
+        self._exts_ignore = val
 
     @property
     def subdirs(self):
@@ -138,7 +240,14 @@ class Directory(object):
 
     @subdirs.setter
     def subdirs(self, val):
-        self._subdirs = _linl(val, sep=',')
+        val = _linl(val, sep=',')
+        # narrowing is masked in _filter, widening needs a rescan
+        _scanned = getattr(self, '_scanned_subdirs', None)
+        if _scanned is not None and (
+            val is None or not set(val) <= set(_scanned)
+        ):
+            self._dirty = True
+        self._subdirs = val
 
     @property
     def subdirs_ignore(self):
@@ -146,7 +255,14 @@ class Directory(object):
 
     @subdirs_ignore.setter
     def subdirs_ignore(self, val):
-        self._subdirs_ignore = _linl(val, sep=',')
+        val = _linl(val, sep=',')
+        # ignoring more is masked in _filter, ignoring less needs a rescan
+        _scanned = getattr(self, '_scanned_subdirs_ignore', None)
+        if _scanned is not None and (
+            val is None or not set(_scanned) <= set(val)
+        ):
+            self._dirty = True
+        self._subdirs_ignore = val
 
     @property
     def hrchy(self):
@@ -155,6 +271,8 @@ class Directory(object):
     @hrchy.setter
     def hrchy(self, val):
         self._hrchy = _linl(val, sep='/')
+        if not hasattr(self, '_labels'):
+            return
 
         # set column names
         n_cols = self._labels.shape[1]
@@ -164,45 +282,221 @@ class Directory(object):
         else:
             n_hrchy = len(self._hrchy)
             self._labels.columns = \
-                self._hrchy + \
+                self._hrchy[:n_cols] + \
                 [f"lv{_ + 1}" for _ in range(n_hrchy, n_cols)]
 
-    def _scandir(self, parent):
-        entries = [_ for _ in os.scandir(parent)]
-        self.entries += entries
-
-        for entry in entries:
-            self._records.append(
-                {
-                    'reldir': (
-                        os.path.dirname(entry)
-                        .replace(self.root, '', 1).strip('/')
-                    ),
-                    'filename': entry.name if entry.is_file() else None,
-                    'filepath': entry.path,
-                    'extension': _get_ext(entry),
-                    'is_file': entry.is_file(),
-                    'size': entry.stat().st_size,
-                    'atime': datetime.fromtimestamp(entry.stat().st_atime),
-                    'mtime': datetime.fromtimestamp(entry.stat().st_mtime),
-                    'ctime': datetime.fromtimestamp(entry.stat().st_ctime),
-                }
+    def _scan(self, entries=None):
+        # reuse a cached scan of an unchanged root
+        key = None
+        if entries is None and self.cache:
+            key = self._cache_key()
+        if key is not None and key in _SCAN_CACHE:
+            _SCAN_CACHE.move_to_end(key)
+            self._table, self._labels = _SCAN_CACHE[key]
+        else:
+            self._build(entries)
+            if key is not None:
+                _SCAN_CACHE[key] = (self._table, self._labels)
+                if len(_SCAN_CACHE) > _SCAN_CACHE_SIZE:
+                    _SCAN_CACHE.popitem(last=False)
+
+        # labels are renamed in place by hrchy, don't touch the cached one
+        self._labels = self._labels.copy(deep=False)
+        self._has_meta = self.include_meta
+        self._scanned_subdirs = self.subdirs
+        self._scanned_subdirs_ignore = self.subdirs_ignore
+        self._dirty = False
+
+    def _cache_key(self):
+        # (helper) tuple of a list-like input, hashable
+        def _freeze(x):
+            return tuple(x) if x is not None else None
+
+        return (
+            self.root,
+            os.stat(self.root).st_mtime_ns,
+            _freeze(self.exts),
+            _freeze(self.exts_ignore),
+            _freeze(self.subdirs),
+            _freeze(self.subdirs_ignore),
+            self.include_meta,
+            self._translate,
+        )
+
+    def invalidate_cache(self):
+        """Drop cached scans of root, next 'table' rescans"""
+        for key in [_ for _ in _SCAN_CACHE if _[0] == self.root]:
+            del _SCAN_CACHE[key]
+        self._dirty = True
+
+    def _build(self, entries=None):
+        # update attrs
+        self._columns = {
+            _: [] for _ in ['reldir', 'filename', 'filepath', 'extension',
+                            'is_file']
+        }
+        # metadata is kept in typed buffers, not lists of python objects
+        if self.include_meta:
+            self._columns['size'] = array('q')
+            for _ in ['atime', 'mtime', 'ctime']:
+                self._columns[_] = array('d')
+        self._collect(self._walk() if entries is None else entries)
+
+        # reldir comes from the walk, factorize it for sorting
+        _codes, _reldirs = pd.factorize(
+            np.asarray(self._columns['reldir'], dtype=object)
+        )
+
+        # sort unique reldirs only, then rows by the rank of their reldir
+        #  - chunks keep walk order, a reldir may continue in the next chunk
+        if self.chunksize is None:
+            _rank = np.empty(len(_reldirs), dtype=np.int64)
+            _rank[
+                sorted(
+                    range(len(_reldirs)),
+                    key=lambda i: (self._translate(_reldirs[i]), _reldirs[i])
+                )
+            ] = np.arange(len(_reldirs))
+            _order = np.argsort(_rank[_codes], kind='stable')
+        else:
+            _rank = np.arange(len(_reldirs))
+            _order = np.arange(len(_codes))
+
+        # gather and convert columns first, then build the table at once
+        _columns = {
+            k: np.asarray(v, dtype=None if k in _TYPED else object)[_order]
+            for k, v in self._columns.items() if k != 'reldir'
+        }
+        del self._columns
+
+        # reldirs are low-cardinality, categories are in sorted order
+        _columns = {
+            'reldir': pd.Categorical.from_codes(
+                _rank[_codes][_order],
+                np.asarray(_reldirs, dtype=object)[np.argsort(_rank)],
+            ),
+            **_columns,
+        }
+
+        # extensions are low-cardinality
+        _columns['extension'] = pd.Categorical(_columns['extension'])
+
+        # convert timestamps at once, in local time
+        if self.include_meta:
+            for _ in ['atime', 'mtime', 'ctime']:
+                _columns[_] = _to_local_datetime(_columns[_])
+
+        self._table = pd.DataFrame(_columns, copy=False)
+
+        # generate labels - split unique reldirs only, then gather by codes
+        # labels are categorical, categories keep the order of appearance
+        _codes = self._table['reldir'].cat.codes.to_numpy()
+        _reldirs = self._table['reldir'].cat.categories
+        _parts = [_.split('/') if _ else [] for _ in _reldirs]
+        _levels = list(zip_longest(*_parts)) or [(None, ) * len(_parts)]
+        self._labels = dict()
+        for i, _level in enumerate(_levels):
+            _level_codes, _level_cats = pd.factorize(
+                np.array(_level, dtype=object)
             )
+            self._labels[i] = pd.Categorical.from_codes(
+                _level_codes[_codes], _level_cats
+            )
+        self._labels = pd.DataFrame(self._labels)
+
+    def _add_meta(self):
+        # stat known paths once, no second walk of the tree
+        size = array('q')
+        atime, mtime, ctime = array('d'), array('d'), array('d')
+        missing = []
+        for i, _ in enumerate(self._table['filepath']):
+            try:
+                st = os.stat(_)
+            except OSError:
+                # removed since the scan or a broken symlink, meta is missing
+                missing.append(i)
+                size.append(0)
+                atime.append(np.nan)
+                mtime.append(np.nan)
+                ctime.append(np.nan)
+                continue
+            size.append(st.st_size)
+            atime.append(st.st_atime)
+            mtime.append(st.st_mtime)
+            ctime.append(st.st_ctime)
+
+        # missing sizes are NaN, times become NaT on conversion
+        #  - rows of broken symlinks are not files and never shown
+        size = np.asarray(size)
+        if missing and self._table['is_file'].to_numpy()[missing].any():
+            size = size.astype(float)
+            size[missing] = np.nan
+
+        # assign returns a new frame, a cached table is left untouched
+        self._table = self._table.assign(
+            size=size,
+            atime=_to_local_datetime(np.asarray(atime)),
+            mtime=_to_local_datetime(np.asarray(mtime)),
+            ctime=_to_local_datetime(np.asarray(ctime)),
+        )
+        self._has_meta = True
+
+    def _walk(self):
+        # extension and subdir filters are applied while walking
+        return _walk_entries(
+            self.root,
+            exts=self.exts,
+            exts_ignore=self.exts_ignore,
+            subdirs=self.subdirs,
+            subdirs_ignore=self.subdirs_ignore,
+            stat=self.include_meta,
+            n_workers=self.n_workers,
+        )
 
-            if entry.is_dir():
-                self._scandir(entry)
+    def _collect(self, entries):
+        # bind appends once, this loop runs once per entry
+        cols = self._columns
+        add_reldir = cols['reldir'].append
+        add_name = cols['filename'].append
+        add_path = cols['filepath'].append
+        add_ext = cols['extension'].append
+        add_is_file = cols['is_file'].append
+        if self.include_meta:
+            add_size = cols['size'].append
+            add_atime = cols['atime'].append
+            add_mtime = cols['mtime'].append
+            add_ctime = cols['ctime'].append
+
+        for entry, st, reldir in entries:
+            is_file = entry.is_file()
+            add_reldir(reldir)
+            add_name(entry.name if is_file else None)
+            add_path(entry.path)
+            add_ext(_get_ext(entry.name))
+            add_is_file(is_file)
+            if st is not None:
+                add_size(st.st_size)
+                add_atime(st.st_atime)
+                add_mtime(st.st_mtime)
+                add_ctime(st.st_ctime)
 
     def _filter(self, is_file=None):
-        indices = np.repeat(True, len(self._table))
+        indices = np.ones(len(self._table), dtype=bool)
         if is_file is not None:
-            indices *= self._table['is_file'].values == is_file
-        if self.exts is not None:
-            indices *= self._table['extension'].isin(self.exts)
-        if self.exts_ignore is not None:
-            indices *= ~self._table['extension'].isin(self.exts_ignore)
+            indices &= self._table['is_file'].to_numpy() == is_file
+
+        # match subdirs against the few categories, then rows by codes
+        _reldir = self._table['reldir'].array
         if self.subdirs is not None:
-            indices *= self._table['reldir'].isin(self.subdirs)
+            indices &= np.isin(
+                _reldir.codes,
+                np.flatnonzero(_reldir.categories.isin(self.subdirs))
+            )
         if self.subdirs_ignore is not None:
-            indices *= ~self._table['reldir'].isin(self.subdirs_ignore)
+            indices &= ~np.isin(
+                _reldir.codes,
+                np.flatnonzero(_reldir.categories.isin(self.subdirs_ignore))
+            )
 
-        return indices
+        # positions gather faster than a mask on sparse selections
+        return np.flatnonzero(indices)
@@ -1,17 +1,26 @@
 import os
-from typing import Callable, Union
-
-import numpy as np
-import pandas as pd
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Union
 
 from .config import ML_WORD_ORDER
 
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+
+# lowered extensions, so equal extensions share one object
+_EXT_CACHE = dict()
+
 
 # _get_ext
 def _get_ext(x: Union[str, os.DirEntry]):
     """Parse extensions from filepath
 
-    (Note) Return without starting '.'.
+    (Note) Return without starting '.'. Leading dots of a filename are not
+    an extension, same as os.path.splitext.
 
     Examples:
         >>> x = 'dir/filepath.jpg'
@@ -24,7 +33,141 @@ def _get_ext(x: Union[str, os.DirEntry]):
     Returns:
         str: Extension of x.
     """
-    return os.path.splitext(x)[-1][1:].lower()
+    if isinstance(x, os.DirEntry):
+        name = x.name
+    else:
+        name = os.path.basename(x)
+
+    name = name.lstrip('.')
+    i = name.rfind('.')
+    if i < 0:
+        return ''
+
+    ext = name[i + 1:]
+    try:
+        return _EXT_CACHE[ext]
+    except KeyError:
+        return _EXT_CACHE.setdefault(ext, ext.lower())
+
+
+# _walk_entries
+def _walk_entries(
+    root: Union[str, os.DirEntry],
+    exts: list = None,
+    exts_ignore: list = None,
+    subdirs: list = None,
+    subdirs_ignore: list = None,
+    stat: bool = True,
+    n_workers: int = 1,
+):
+    """Walk directory iteratively and stat each entry at most once
+
+    (Note)
+        Directories are walked with an explicit stack, not recursion.
+        Entries are filtered by extension and subdir before they are
+        stat()ed, and directories leading to none of 'subdirs' are not
+        descended at all.
+        If n_workers > 1, directories are scanned by a thread pool and
+        yielded as they complete, which pays off on large trees and
+        high-latency (network) filesystems. Entries of a directory stay
+        together and in order.
+
+    Args:
+        root (str, os.DirEntry): Root directory to walk.
+        exts (list, optional): Extensions of files to yield. Defaults to None.
+        exts_ignore (list, optional):
+            Extensions of files to skip. Defaults to None.
+        subdirs (list, optional):
+            Directories, relative to root with '/' separator, whose entries
+            are yielded. Defaults to None.
+        subdirs_ignore (list, optional):
+            Directories, relative to root with '/' separator, whose entries
+            are skipped. Their subdirectories are still walked.
+            Defaults to None.
+        stat (bool, optional):
+            If false, stat_result is None and no stat() is issued.
+            Defaults to True.
+        n_workers (int, optional):
+            Number of threads scanning directories. Defaults to 1.
+
+    Yields:
+        tuple: (DirEntry, stat_result, reldir) of every entry under root,
+            reldir is relative to root with '/' separator.
+    """
+    root = os.fspath(root)
+    # _get_ext returns lowercase suffix without dot, compare in the same form
+    if exts is not None:
+        exts = frozenset(_.strip('.').lower() for _ in exts)
+    if exts_ignore is not None:
+        exts_ignore = frozenset(_.strip('.').lower() for _ in exts_ignore)
+
+    # directories leading to subdirs are walked, but not yielded from
+    descend = None
+    if subdirs is not None:
+        subdirs = frozenset(_.strip('/') for _ in subdirs)
+        descend = {''}
+        for _ in subdirs:
+            _parts = _.split('/')
+            descend.update(
+                '/'.join(_parts[:i + 1]) for i in range(len(_parts))
+            )
+    if subdirs_ignore is not None:
+        subdirs_ignore = frozenset(_.strip('/') for _ in subdirs_ignore)
+
+    # (helper) entries of a single directory and its subdirectories
+    def _scan(parent, reldir):
+        with os.scandir(parent) as it:
+            entries = list(it)
+
+        keep = (
+            (subdirs is None or reldir in subdirs)
+            and (subdirs_ignore is None or reldir not in subdirs_ignore)
+        )
+
+        # reldir of children is known from the parent, no path parsing
+        prefix = f"{reldir}/" if reldir else ''
+
+        results, dirs = [], []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                _reldir = prefix + entry.name
+                if descend is None or _reldir in descend:
+                    dirs.append((entry.path, _reldir))
+            elif exts is not None or exts_ignore is not None:
+                ext = _get_ext(entry)
+                if exts is not None and ext not in exts:
+                    continue
+                if exts_ignore is not None and ext in exts_ignore:
+                    continue
+            if keep:
+                results.append(
+                    (entry, entry.stat() if stat else None, reldir)
+                )
+
+        return results, dirs
+
+    # (helper) walk a subtree serially
+    def _walk(top):
+        stack = [top]
+        while stack:
+            results, dirs = _scan(*stack.pop())
+            yield from results
+            stack.extend(dirs)
+
+    if n_workers is None or n_workers <= 1:
+        yield from _walk((root, ''))
+        return
+
+    # every directory is a task, so one deep subtree doesn't serialize the
+    # walk - os.scandir and stat release the GIL
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        pending = {executor.submit(_scan, root, '')}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                results, dirs = future.result()
+                pending |= {executor.submit(_scan, *_) for _ in dirs}
+                yield from results
 
 
 # _drop_root - DEPRECATED
@@ -87,27 +230,54 @@ def _gen_ordering_func(order=None):
     if order is None:
         order = ML_WORD_ORDER
 
+    # freeze order, so the compiled function is reused across calls
+    return _compile_ordering_func(tuple(
+        tuple(_list) if isinstance(_list, list) else (_list, )
+        for _list in order
+    ))
+
+
+# (helper) _compile_ordering_func
+@lru_cache(maxsize=32)
+def _compile_ordering_func(order: tuple):
+
     # generate map
     _order = dict()
     for i, _list in enumerate(order):
-        if not isinstance(_list, list):
-            _list = [_list]
         _order.update(
             {_elem: f"{str(i)}_" for _elem in _list}
         )
 
-    # define translate
-    def _translate(x: str, order: dict = _order):
+    # compile map into a single pattern, longest word first so that
+    # 'evaluation' is not matched as 'eval' + 'uation'
+    _pattern = None
+    if _order:
+        _pattern = re.compile(
+            '|'.join(map(re.escape, sorted(_order, key=len, reverse=True)))
+        )
 
-        if x is not None:
-            if isinstance(x, os.DirEntry):
-                x = x.path
-            x = x.lower()
-            for k, v in order.items():
-                x = x.replace(k, v)
+    def _repl(m):
+        return _order[m.group(0)]
 
+    # (helper) cached on str only - bounded, the function is shared
+    @lru_cache(maxsize=2 ** 16)
+    def _translate_str(x: str):
+        x = x.lower()
+        if _pattern is not None:
+            x = _pattern.sub(_repl, x)
         return x
 
+    # define translate - DirEntry hashes by identity, never cache on it
+    def _translate(x: str):
+        if x is None:
+            return x
+        if isinstance(x, os.DirEntry):
+            x = x.path
+        return _translate_str(x)
+
+    _translate.cache_info = _translate_str.cache_info
+    _translate.cache_clear = _translate_str.cache_clear
+
     return _translate
 
 
@@ -138,11 +308,25 @@ def _sorted(
     raise TypeError(f"[ERROR] Type {type(x)} is not supported.")
 
 
+# (helper) _is_selected_file
+def _is_selected_file(
+    x: Union[str, os.DirEntry],
+    extensions: frozenset,
+) -> bool:
+    if isinstance(x, os.DirEntry):
+        return (
+            x.name.rpartition('.')[-1].lower() in extensions and x.is_file()
+        )
+    return (
+        x.rpartition('.')[-1].lower() in extensions and os.path.isfile(x)
+    )
+
+
 # _filter_files - DEPRECATED
 def _filter_files(
     files: list,
     extensions: list = None,
-    subdirs: list = None
+    subdirs: list = None,
 ) -> list:
     """Filter list of files by extensions and/or subdirs
 
@@ -162,7 +346,9 @@ def _filter_files(
         ['data/test/OK/01.jpg', 'data/train/NG/02.jpg']
 
     Args:
-        files (list): list like ['dir/file01.ext', 'dir/file02.ext', ...].
+        files (list):
+            list like ['dir/file01.ext', 'dir/file02.ext', ...], or list of
+            os.DirEntry whose cached is_file() replaces os.path.isfile.
         extensions (list, optional): list of extensions. Defaults to None.
         subdirs (list, optional): list of subdirs. Defaults to None.
 
@@ -176,13 +362,13 @@ def _filter_files(
     if extensions is not None:
         if not isinstance(extensions, list):
             extensions = [extensions]
-        extensions = [_.strip('.') for _ in extensions]
-        files = [x for x in files if os.path.isfile(x) and (
-            x.rsplit('.', 1)[-1].lower() in extensions)]
+        extensions = frozenset(_.strip('.').lower() for _ in extensions)
+        files = [x for x in files if _is_selected_file(x, extensions)]
 
     if subdirs is not None:
         if not isinstance(subdirs, list):
             subdirs = [subdirs]
+        subdirs = frozenset(subdirs)
         files = [x for x in files if os.path.dirname(x) in subdirs]
 
     return files
@@ -190,7 +376,7 @@ def _filter_files(
 
 # _head_tail
 def _head_tail(
-    x: Union[list, dict, np.ndarray, pd.DataFrame],
+    x: Union[list, dict, 'np.ndarray', 'pd.DataFrame'],
     head: int = 5,
     tail: int = 5,
     concat: bool = False,
@@ -209,6 +395,9 @@ def _head_tail(
     Returns:
         tuple: (head records, tail records) if concat is False.
     """
+    import numpy as np
+    import pandas as pd
+
     # correct args
     if head is None:
         head = 0
@@ -231,6 +420,11 @@ def _head_tail(
         else:
             return _head + _tail
 
+    # gather head and tail at once, not slice and concat
+    if concat and isinstance(x, (np.ndarray, pd.DataFrame)):
+        idx = np.r_[0:head, n - tail:n]
+        return x.iloc[idx] if isinstance(x, pd.DataFrame) else x[idx]
+
     # if x is np.ndarray
     if isinstance(x, np.ndarray):
         _head = x[:head]
@@ -253,17 +447,17 @@ def _head_tail(
     if isinstance(x, dict):
         _keys = list(x.keys())
         _head = {k: x[k] for k in _keys[:head]}
-        _tail = {k: x[k] for k in _keys[-tail]} if tail > 0 else None
+        _tail = {k: x[k] for k in _keys[-tail:]} if tail > 0 else None
         if not concat:
             return _head, _tail
         else:
-            return {**_head, **_tail}
+            return {**_head, **(_tail or {})}
 
     raise TypeError('list, dict, np.ndarray, pd.DataFrame are only supported!')
 
 
 # _estimate_root
-def _estimate_root(filepaths: pd.Series) -> str:
+def _estimate_root(filepaths: 'pd.Series') -> str:
     """Estimate root path
 
     (NOTE)
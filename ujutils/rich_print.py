@@ -1,7 +1,7 @@
 import os
-from typing import Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Union
 
-import pandas as pd
 from rich.console import Console
 from rich.filesize import decimal
 from rich.markup import escape
@@ -9,15 +9,18 @@ from rich.table import Table
 from rich.text import Text
 from rich.tree import Tree
 
-from .misc import _head_tail, _linl
+from .misc import _get_ext, _head_tail, _linl
 from .common import mlsorted
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 ################################################################
 # rich_table
 ################################################################
 def rich_table(
-    df: pd.DataFrame,
+    df: 'pd.DataFrame',
     title: str = None,
     head: int = None,
     tail: int = None,
@@ -44,21 +47,22 @@ def rich_table(
     for c in df.columns:
         table.add_column(c, justify='left', )
 
+    # (helper) add rows of a dataframe at once, strings are kept as they are
+    def _add_rows(x):
+        for row in x.itertuples(index=False, name=None):
+            table.add_row(*[_ if type(_) is str else str(_) for _ in row])
+
     # add rows
     if head is None and tail is None:
-        for idx in df.index:
-            table.add_row(*[str(_) for _ in df.loc[idx, :].values])
+        _add_rows(df)
     else:
         _head, _tail = _head_tail(df, head=head, tail=tail)
-        if _head is not None:
-            for idx in df.index[:head]:
-                table.add_row(*[str(_) for _ in df.loc[idx, :].values])
-        if len(_head) < len(df):
-            for _ in range(1):
-                table.add_row(*['...' for _ in df.columns])
+        _add_rows(_head)
+        n_tail = len(_tail) if _tail is not None else 0
+        if len(_head) + n_tail < len(df):
+            table.add_row(*['...'] * len(df.columns))
         if _tail is not None:
-            for idx in df.index[-tail:]:
-                table.add_row(*[str(_) for _ in df.loc[idx, :].values])
+            _add_rows(_tail)
 
     if console is None:
         console = Console()
@@ -66,6 +70,38 @@ def rich_table(
     console.print(table)
 
 
+################################################################
+# (helper for rich_tree) _list_dir
+################################################################
+def _list_dir(
+    root: Union[str, os.DirEntry],
+    extensions: frozenset = None,
+    stat: bool = False,
+) -> tuple:
+    """List sorted directories and (selected) files of a directory."""
+
+    # sort dirs first then by filename
+    with os.scandir(root) as it:
+        entries = mlsorted(it)
+
+    # split directories and files
+    dirs, paths = [], []
+    for _ in entries:
+        (dirs if _.is_dir(follow_symlinks=False) else paths).append(_)
+    n_files = len(paths)
+
+    # filter extensions
+    if extensions is not None:
+        paths = [_ for _ in paths if _get_ext(_) in extensions]
+
+    # DirEntry caches stat(), so prefetched stats are reused later
+    if stat:
+        for _ in paths:
+            _.stat()
+
+    return len(entries), dirs, n_files, paths
+
+
 ################################################################
 # (helper for rich_tree) _generate_tree
 ################################################################
@@ -76,6 +112,8 @@ def _generate_tree(
     max_files: int = 3,
     incl_hidden: bool = False,
     _info: dict = None,
+    _executor: ThreadPoolExecutor = None,
+    _listing: tuple = None,
 ) -> Tree:
     """Recursively build a Tree with directory contents."""
 
@@ -86,8 +124,11 @@ def _generate_tree(
     EXTENSION_COLOR = 'white'
 
     # correct args
-    if extensions is not None:
-        extensions = _linl(extensions, sep=',', strip='. ')
+    # _get_ext returns lowercase suffix, compare in the same form
+    if extensions is not None and not isinstance(extensions, frozenset):
+        extensions = frozenset(
+            _.lower() for _ in _linl(extensions, sep=',', strip='. ')
+        )
     if _info is None:
         _info = {
             'n_entries': 0,
@@ -96,26 +137,17 @@ def _generate_tree(
             'n_files_selected': 0,
         }
 
-    # sort dirs first then by filename
-    entries = mlsorted(os.scandir(root))
-
-    # split directories and files
-    dirs, paths = [], []
-    _ = [dirs.append(_) if _.is_dir() else paths.append(_) for _ in entries]
+    # list directory, unless it was prefetched
+    if _listing is None:
+        _listing = _list_dir(root, extensions=extensions)
+    n_entries, dirs, n_files, paths = _listing
 
-    _info['n_entries'] += len(_)
+    _info['n_entries'] += n_entries
     _info['n_dirs'] += len(dirs)
-    _info['n_files'] += len(paths)
-
-    # filter extensions
-    if extensions is not None:
-        paths = [
-            _ for _ in paths if os.path.splitext(_)[-1][1:] in extensions
-        ]
-
+    _info['n_files'] += n_files
     _info['n_files_selected'] += len(paths)
 
-    # ellipse paths
+    # ellipse paths - DirEntry caches stat(), so no file is stat()ed twice
     n_paths = len(paths)
     ellipsis = None
     if max_files is not None:
@@ -132,13 +164,20 @@ def _generate_tree(
             ])
             paths = paths[:max_files]
 
+    # ignore hidden directories
+    if not incl_hidden:
+        dirs = [_ for _ in dirs if not _.name.startswith(".")]
+
+    # prefetch listings of subdirectories, the tree is still built in order
+    listings = dict()
+    if _executor is not None:
+        listings = {
+            _dir.path: _executor.submit(_list_dir, _dir, extensions, True)
+            for _dir in dirs
+        }
+
     # add directory nodes
     for _dir in dirs:
-        # ignore hidden files
-        if _dir.name.startswith("."):
-            if not incl_hidden:
-                continue
-
         # add branch
         style = "dim" if _dir.name.startswith("__") else ""
         _text = ''.join([
@@ -153,7 +192,12 @@ def _generate_tree(
             extensions=extensions,
             max_files=max_files,
             incl_hidden=incl_hidden,
-            _info=_info
+            _info=_info,
+            _executor=_executor,
+            _listing=(
+                listings[_dir.path].result() if _dir.path in listings
+                else None
+            ),
         )
 
     # add file nodes
@@ -183,7 +227,8 @@ def rich_tree(
     extensions: Union[str, list] = None,
     max_files: int = 3,
     incl_hidden=False,
-    console=None
+    console=None,
+    n_workers: int = 1,
 ):
     """Print tree of files
 
@@ -193,22 +238,40 @@ def rich_tree(
         max_files (int, optional): The excess will be omitted. Defaults to 3.
         incl_hidden (bool, optional): Defaults to False.
         console ([type], optional): Rich console. Defaults to None.
+        n_workers (int, optional):
+            Threads prefetching subdirectory listings, worth raising on
+            network filesystems. Defaults to 1.
     """
 
     GUIDE_STYLE = "white"
 
     root = os.path.abspath(root)
+    if extensions is not None:
+        extensions = frozenset(
+            _.lower() for _ in _linl(extensions, sep=',', strip='. ')
+        )
     tree = Tree(
         f"(root) [link file://{root}]{root}",
         guide_style=GUIDE_STYLE,
     )
-    _generate_tree(
-        root,
-        tree,
-        extensions=extensions,
-        max_files=max_files,
-        incl_hidden=incl_hidden
-    )
+    if n_workers is None or n_workers <= 1:
+        _generate_tree(
+            root,
+            tree,
+            extensions=extensions,
+            max_files=max_files,
+            incl_hidden=incl_hidden
+        )
+    else:
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            _generate_tree(
+                root,
+                tree,
+                extensions=extensions,
+                max_files=max_files,
+                incl_hidden=incl_hidden,
+                _executor=executor,
+            )
 
     if console is None:
         console = Console()
@@ -1,20 +1,39 @@
 import itertools
 import os
+from typing import TYPE_CHECKING
 
 import click
 from InquirerPy import inquirer
 from rich.console import Console
 
-from ..directory import Directory
 from ..common import mlsorted, inspect_dir
 from ..config import _STYLE, CHECKBOX_STYLE, EXTS_IMAGE, EXTS_SIGNAL, EXTS_TEXT
 from ..misc import _linl
 from ..rich_print import rich_table, rich_tree
 
+# numpy and pandas are imported by Directory, only when a table is built
+if TYPE_CHECKING:
+    from ..directory import Directory
+
 
 ################################################################
 # CLI helpers
 ################################################################
+# table writers by extension of destination
+#  - csv: formatted and written by chunks of rows, not as a whole
+#  - xlsx: xlsxwriter writes much faster than openpyxl, (NOTE) constant_memory
+#    is not used as pandas writes column by column
+_WRITERS = {
+    'csv': lambda df, path: df.to_csv(path, index=False, chunksize=50000),
+    'xlsx': lambda df, path: df.to_excel(
+        path, index=False, engine='xlsxwriter'
+    ),
+    'parquet': lambda df, path: df.to_parquet(
+        path, engine='pyarrow', compression='snappy'
+    ),
+}
+
+
 # (helper) _user_select_extensions
 def _user_select_extensions() -> list:
     """User select extensions
@@ -47,7 +66,7 @@ def _user_select_extensions() -> list:
 
 
 # (helper) _user_select_subdirs
-def _user_select_subdirs(directory: Directory) -> list:
+def _user_select_subdirs(directory: 'Directory') -> list:
     """User selects subdirs from checkbox
 
     Args:
@@ -56,7 +75,8 @@ def _user_select_subdirs(directory: Directory) -> list:
     Returns:
         list: list of selected subdirs
     """
-    _dirs = directory.table.value_counts('reldir').to_dict()
+    # reldir is categorical with categories in ML order - count the codes
+    _dirs = directory.table['reldir'].value_counts(sort=False).to_dict()
 
     def q(_):
         return [
@@ -79,7 +99,7 @@ def _user_select_subdirs(directory: Directory) -> list:
 
 
 # (helper) _get_levs_from_hrchy
-def _user_set_hrchy(directory) -> list:
+def _user_set_hrchy(subdirs: list) -> list:
     """User sets name of hierarchy levels
 
     Examples:
@@ -96,8 +116,7 @@ def _user_set_hrchy(directory) -> list:
         list: [description]
     """
 
-    subdirs = mlsorted(directory.table['reldir'].unique())
-
+    # order does not matter here, values of each level are sorted below
     if subdirs != ['']:
         _transpose = itertools.zip_longest(*[_.split('/') for _ in subdirs])
         _columns = [
@@ -136,11 +155,6 @@ def cli_table_files(root='.'):
         f"[yellow][Start][/yellow] Generate table of files for {_abspath}",
     )
 
-    # take a snapshot
-    console.print("Scan direcotry...", end=' ')
-    directory = Directory(root)
-    console.print("DONE!")
-
     # START INSTRUCTION
     console.print(
         ' '.join([
@@ -149,21 +163,35 @@ def cli_table_files(root='.'):
         ])
     )
 
-    # select extensions and filter
-    directory.exts = _user_select_extensions()
+    # select extensions - filtered while scanning
+    exts = _user_select_extensions()
 
-    # check whether meta is included
-    directory.include_meta = inquirer.confirm(
+    # check whether meta is included - stat() only if needed
+    include_meta = inquirer.confirm(
         message="Include metadata? (size, modified time):",
         default=False
     ).execute()
 
+    # take a snapshot
+    from ..directory import Directory
+
+    console.print("Scan direcotry...", end=' ')
+    directory = Directory(
+        root,
+        exts=exts,
+        include_meta=include_meta,
+        n_workers=min(8, os.cpu_count() or 1),
+    )
+    console.print("DONE!")
+
     # select subdirs and filter
-    directory.subdirs = _user_select_subdirs(directory)
+    #  - subdirs match reldir exactly, selection is the reldirs of the table
+    subdirs = _user_select_subdirs(directory)
+    directory.subdirs = subdirs
 
     # set column names
     # I'M HERE!!!
-    directory.hrchy = _user_set_hrchy(directory)
+    directory.hrchy = _user_set_hrchy(subdirs)
 
     # create table
     df = directory.table
@@ -193,20 +221,12 @@ def cli_table_files(root='.'):
 
     # set filepath to save
     dst_path = inquirer.text(
-        message="Enter path to save ('csv', 'xlsx' are only supported):",
-        validate=lambda x: x.lower().rsplit(
-            '.', 1)[-1] in ['csv', 'xlsx', 'parquet'],
-        invalide_message="Can choose .csv, .xlsx, .parquet"
+        message="Enter path to save ('csv', 'xlsx', 'parquet' are supported):",
+        validate=lambda x: x.rsplit('.', 1)[-1].lower() in _WRITERS,
+        invalid_message="Can choose .csv, .xlsx, .parquet"
     ).execute()
 
-    if dst_path.lower().endswith('.csv'):
-        df.to_csv(dst_path, index=False)
-
-    if dst_path.lower().endswith('.xlsx'):
-        df.to_excel(dst_path, index=False)
-
-    if dst_path.lower().endswith('.parquet'):
-        df.to_parquet(dst_path, )
+    _WRITERS[dst_path.rsplit('.', 1)[-1].lower()](df, dst_path)
 
     console.print(f"[yellow][Done][/yellow] '{dst_path}' saved.\n")
     return
@@ -1,14 +1,50 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 import streamlit as st
 from PIL import Image
 from ujutils.misc import _estimate_root
 
+
+# (helper) _load_labels
+#  - only filepath is used, the rest of columns are not parsed
+#  - root is estimated once with the table, not on every rerun
+@st.cache_data(show_spinner=False)
+def _load_labels(path: str, mtime: float):
+    df = pd.read_csv(path, usecols=['filepath'], engine='pyarrow')
+    return df, _estimate_root(df['filepath'])
+
+
+# (helper) _load_thumb
+#  - streamlit reruns the script on every widget change, decode once
+#  - mtime is a part of the key, a modified file is decoded again
+@st.cache_data(show_spinner=False)
+def _load_thumb(path: str, mtime: float, max_side: int = 512):
+    im = Image.open(path)
+    im.thumbnail((max_side, max_side))
+    return im
+
+
+# (helper) _load_image
+def _load_image(row):
+    try:
+        return {
+            'image': _load_thumb(row.filepath, os.path.getmtime(row.filepath)),
+            'caption': f"Image No. {row.Index+1}"
+        }
+    except Exception as ex:
+        return {
+            'image': None,
+            'caption': f"Broken {ex}"
+        }
+
+
 st.set_page_config(
     layout="wide", page_title="Page Title",
 )
 
-df = pd.read_csv('labels.csv')
-root = _estimate_root(df['filepath'])
+df, root = _load_labels('labels.csv', os.path.getmtime('labels.csv'))
 
 with st.sidebar:
     st.header("Configuration")
@@ -31,29 +67,18 @@ st.caption(
     ])
 )
 
-images = []
-for idx in df.index[:n_photos]:
-    try:
-        images.append(
-            {
-                'image': Image.open(df.at[idx, 'filepath']),
-                'caption': f"Image No. {idx+1}"
-            }
-        )
-    except Exception as ex:
-        images.append(
-            {
-                'image': None,
-                'caption': f"Broken {ex}"
-            }
-        )
-
-n_rows = 1 + len(images) // n_cols
-rows = [st.container() for _ in range(int(n_rows))]
-
-cols_per_row = [r.columns(n_cols) for r in rows]
-
-for i, img in enumerate(images):
-    with rows[i // n_cols]:
-        if img['image'] is not None:
-            cols_per_row[i // n_cols][i % n_cols].image(**img)
+# decode in threads - PIL releases the GIL while reading and decoding
+with ThreadPoolExecutor(max_workers=min(16, n_photos)) as executor:
+    images = list(
+        executor.map(_load_image, df.head(n_photos).itertuples())
+    )
+
+# one container per row, columns are laid out row by row
+n_rows = -(-len(images) // n_cols)
+cols = [
+    col for _ in range(n_rows) for col in st.container().columns(n_cols)
+]
+
+for col, img in zip(cols, images):
+    if img['image'] is not None:
+        col.image(**img)
@@ -8,9 +8,13 @@ def _gen_card(
     id,
     imgs: list = None,
     contents: str = None,
-    style: dict = {'width': '18rem'},
+    style: dict = None,
 ):
 
+    # default style is created per call, a dict default is shared by calls
+    if style is None:
+        style = {'width': '18rem'}
+
     children = []
 
     if imgs is not None: